@@ -1,16 +1,22 @@
 import datetime as dt
+import hashlib
 import json
 import sys
+import threading
+import time
 import traceback
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from loguru import logger
 from PyQt5 import uic
 from PyQt5.QtCore import QSettings, QTime
 from PyQt5.QtWidgets import QWidget
 from qfluentwidgets import (
+    BodyLabel,
     LineEdit,
     MessageBox,
     PrimaryPushButton,
@@ -19,6 +25,23 @@ from qfluentwidgets import (
 )
 
 
+DEFAULT_EXCLUDED_COURSES = ("未添加", "暂无课程", "", "无课程")
+
+
+def parse_excluded_courses(excluded_courses_str: str) -> List[str]:
+    """解析以逗号分隔的排除课程列表"""
+    return [c.strip() for c in (excluded_courses_str or "").split(",") if c.strip()]
+
+
+def is_valid_course(course_name: str, excluded_courses: Optional[List[str]] = None) -> bool:
+    """检查课程是否有效(非空、非占位且不在排除列表中)"""
+    if not course_name:
+        return False
+    if excluded_courses is None:
+        excluded_courses = []
+    return course_name not in DEFAULT_EXCLUDED_COURSES and course_name not in excluded_courses
+
+
 class PluginBase:
     """插件基类"""
 
@@ -44,18 +67,448 @@ class SettingsBase(QWidget):
         self.settings = QSettings(str(self.PATH / "config.ini"), QSettings.IniFormat)
 
 
+class ContextWatcher:
+    """
+    监听 cw_contexts 中声明的键,仅在值真正变化时触发失效回调
+
+    每次 tick 只比较声明过的键(先比较对象标识,再比较值),
+    未变化时不做任何额外工作
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(keys)
+        self._snapshot: Dict[str, Any] = dict.fromkeys(self.keys)
+        self._callbacks: List[Tuple[Tuple[str, ...], Callable[[Dict[str, Tuple[Any, Any]]], None]]] = []
+
+    def register(
+        self,
+        callback: Callable[[Dict[str, Tuple[Any, Any]]], None],
+        keys: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        注册失效回调
+
+        Args:
+            callback: 回调函数,参数为 {键: (旧值, 新值)}
+            keys: 关心的键,默认为全部声明的键
+        """
+        watched = tuple(keys) if keys is not None else self.keys
+        unknown = [k for k in watched if k not in self.keys]
+        if unknown:
+            raise KeyError(f"未声明的上下文键: {unknown}")
+        self._callbacks.append((watched, callback))
+
+    def prime(self, cw_contexts: Dict[str, Any]) -> None:
+        """以当前上下文作为基准,不触发回调"""
+        for key in self.keys:
+            self._snapshot[key] = cw_contexts.get(key)
+
+    def check(self, cw_contexts: Dict[str, Any]) -> bool:
+        """比较声明的键,有变化时触发相关回调,返回是否发生变化"""
+        changed = {}
+        for key in self.keys:
+            new_value = cw_contexts.get(key)
+            old_value = self._snapshot[key]
+            if new_value is old_value or new_value == old_value:
+                continue
+            self._snapshot[key] = new_value
+            changed[key] = (old_value, new_value)
+        if not changed:
+            return False
+        for watched, callback in self._callbacks:
+            if any(key in changed for key in watched):
+                try:
+                    callback(changed)
+                except Exception as e:
+                    logger.error(f"上下文变化回调执行失败: {e}")
+        return True
+
+
+class CourseIndex:
+    """
+    课表的内存索引
+
+    按(星期, 是否双周)缓存展开后的课程节次,首次访问时解析,
+    之后的筛选只在内存中进行,不再访问磁盘
+    """
+
+    def __init__(
+        self,
+        schedule_data: Dict[str, Any],
+        expander: Callable[[Dict[str, Any], int, bool], List[str]],
+    ):
+        """
+        Args:
+            schedule_data: 课表数据
+            expander: 展开指定日期课程节次的函数,参数为(课表数据, 星期, 是否双周)
+        """
+        self.schedule_data = schedule_data
+        self.expander = expander
+        self._lessons: Dict[Tuple[int, bool], List[str]] = {}
+
+    def lessons(self, weekday: int, is_even_week: bool) -> List[str]:
+        """获取指定日期的全部课程节次(未经筛选)"""
+        key = (weekday, is_even_week)
+        lessons = self._lessons.get(key)
+        if lessons is None:
+            lessons = self.expander(self.schedule_data, weekday, is_even_week)
+            self._lessons[key] = lessons
+        return lessons
+
+    def select(
+        self, weekday: int, is_even_week: bool, excluded_courses: List[str], course_count: int
+    ) -> List[str]:
+        """
+        按排除列表与课程数量筛选课程
+
+        Args:
+            weekday: 星期几(0-6)
+            is_even_week: 是否为双周
+            excluded_courses: 排除的课程列表
+            course_count: 最多显示的课程数量
+
+        Returns:
+            筛选后的课程列表
+        """
+        courses = []
+        for course_name in self.lessons(weekday, is_even_week):
+            if is_valid_course(course_name, excluded_courses):
+                courses.append(course_name)
+                if len(courses) >= course_count:
+                    break
+        return courses
+
+
+class PluginState:
+    """
+    进程内共享的插件状态,由 Plugin 与 Settings 共用
+
+    保存已解析的课表、课程索引、单双周、设置快照与主程序上下文,
+    设置页的预览与测试通知可直接复用运行中插件的热数据
+    """
+
+    PARITY_TTL = 60.0  # 单双周缓存有效期(秒)
+
+    def __init__(self):
+        self.plugin: Optional["Plugin"] = None
+        self.cw_contexts: Dict[str, Any] = {}
+        self.schedule: Optional[Tuple[Path, int, Dict[str, Any]]] = None  # (路径, mtime_ns, 数据)
+        self.course_index: Optional[CourseIndex] = None
+        self.parity: Optional[Tuple[dt.date, float, bool]] = None  # (日期, 记录时间, 是否双周)
+        self.settings_snapshot: Optional[Dict[str, Any]] = None
+        self.settings_mtime: Optional[int] = None
+
+    def attach(self, plugin: "Plugin") -> None:
+        """登记正在运行的插件实例,替换旧实例时清除其留下的缓存"""
+        if self.plugin is not None and self.plugin is not plugin:
+            # 旧实例的接口仍占用端口,需先停止
+            self.plugin.stop_payload_server()
+            self.invalidate_schedule()
+            self.settings_snapshot = None
+            self.settings_mtime = None
+        self.plugin = plugin
+        self.cw_contexts = plugin.cw_contexts or {}
+
+    def update_settings(self, settings: QSettings, mtime: Optional[int]) -> Dict[str, Any]:
+        """从 QSettings 读取设置快照"""
+        self.settings_snapshot = {
+            "enable_tip": settings.value("enable_tip", True, type=bool),
+            "tip_time": settings.value("tip_time", "18:00:00"),
+            "course_count": settings.value("course_count", 4, type=int),
+            "excluded_courses": parse_excluded_courses(settings.value("excluded_courses", "")),
+            "notification_duration": settings.value("notification_duration", 10000, type=int),
+        }
+        self.settings_mtime = mtime
+        return self.settings_snapshot
+
+    def get_parity(self) -> Optional[bool]:
+        """获取缓存的单双周信息,过期时返回 None"""
+        parity = self.parity
+        if parity is None or parity[0] != dt.date.today() or time.monotonic() - parity[1] > self.PARITY_TTL:
+            return None
+        return parity[2]
+
+    def set_parity(self, is_even_week: bool) -> None:
+        self.parity = (dt.date.today(), time.monotonic(), is_even_week)
+
+    def invalidate_schedule(self, *_) -> None:
+        """清除课表相关缓存"""
+        self.schedule = None
+        self.course_index = None
+        self.parity = None
+
+
+STATE = PluginState()
+
+
+class CircuitOpenError(RuntimeError):
+    """阶段处于熔断状态时抛出"""
+
+
+class CircuitBreaker:
+    """
+    单个处理阶段的熔断器
+
+    连续失败达到阈值后熔断,按指数退避暂停该阶段;
+    熔断期间仅在相关文件变化或退避到期时重试,状态变化只记录一次
+    """
+
+    def __init__(
+        self,
+        name: str,
+        threshold: int = 3,
+        base_delay: float = 5.0,
+        max_delay: float = 600.0,
+        watch: Optional[Callable[[], Any]] = None,
+        log_level: str = "ERROR",
+    ):
+        """
+        Args:
+            name: 阶段名称(用于日志)
+            threshold: 触发熔断的连续失败次数
+            base_delay: 首次退避时长(秒)
+            max_delay: 最长退避时长(秒)
+            watch: 返回相关文件状态(如 mtime)的函数,其值变化时立即允许重试
+            log_level: 日志级别
+        """
+        self.name = name
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.watch = watch
+        self.log_level = log_level
+        self.failures = 0
+        self._delay = base_delay
+        self._open_until = 0.0
+        self._watch_value: Any = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.failures >= self.threshold
+
+    def allow(self) -> bool:
+        """当前是否允许执行该阶段"""
+        if not self.is_open:
+            return True
+        if self.watch is not None and self._read_watch() != self._watch_value:
+            logger.info(f"{self.name}: 检测到相关文件变化,尝试恢复")
+            return True
+        return time.monotonic() >= self._open_until
+
+    def record_success(self) -> None:
+        """记录一次成功,熔断状态下恢复正常"""
+        if self.failures == 0:
+            return
+        if self.is_open:
+            logger.info(f"{self.name}: 已恢复正常")
+        self.failures = 0
+        self._delay = self.base_delay
+
+    def record_failure(self, exc: BaseException) -> None:
+        """记录一次失败,达到阈值后熔断并按指数退避"""
+        self.failures += 1
+        if self.failures < self.threshold:
+            logger.log(self.log_level, f"{self.name}失败({self.failures}/{self.threshold}): {exc}")
+            return
+        if self.failures == self.threshold:
+            self._delay = self.base_delay
+            details = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+            logger.log(
+                self.log_level,
+                f"{self.name}连续失败 {self.failures} 次,已暂停,"
+                f"将在相关文件变化或 {self._delay:.0f} 秒后重试: {exc}\n{details}",
+            )
+        else:
+            self._delay = min(self._delay * 2, self.max_delay)
+            logger.debug(f"{self.name}重试失败,{self._delay:.0f} 秒后再试: {exc}")
+        self._open_until = time.monotonic() + self._delay
+        self._watch_value = self._read_watch()
+
+    def reset(self, *_) -> None:
+        """清除失败记录(例如相关上下文已变化)"""
+        self.failures = 0
+        self._delay = self.base_delay
+
+    def _read_watch(self) -> Any:
+        if self.watch is None:
+            return None
+        try:
+            return self.watch()
+        except Exception:
+            return None
+
+
+class ProfileCapture:
+    """一次性的 cProfile 采集,结束后将 pstats 写入指定目录"""
+
+    def __init__(self, label: str, output_dir: Path):
+        import cProfile
+
+        self.label = label
+        self.output_dir = Path(output_dir)
+        self.profile = cProfile.Profile()
+        self.active = False
+
+    def start(self) -> None:
+        """开始采集(已有其他分析器或追踪器时可能抛出 ValueError)"""
+        self.profile.enable()
+        self.active = True
+
+    def stop(self) -> None:
+        """停止采集"""
+        if self.active:
+            self.profile.disable()
+            self.active = False
+
+    def dump(self) -> Optional[Path]:
+        """写出采集结果,返回文件路径"""
+        path = self.output_dir / f"profile_{self.label}_{datetime.now():%Y%m%d_%H%M%S}.pstats"
+        try:
+            self.profile.dump_stats(str(path))
+        except OSError as e:
+            logger.error(f"写入性能分析结果失败: {e}")
+            return None
+        logger.info(f"性能分析结果已保存: {path}")
+        return path
+
+
+class _PayloadRequestHandler(BaseHTTPRequestHandler):
+    """明日课程接口请求处理"""
+
+    server_version = "cw-tomorrow-tip"
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/tomorrow"):
+            self._send_empty(404)
+            return
+        body, etag = self.server.payload_server.snapshot()
+        if body is None:
+            self._send_empty(503)
+            return
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            if "*" in tags or etag in tags:
+                self._send_empty(304, etag)
+                return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, code: int, etag: Optional[str] = None):
+        self.send_response(code)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # noqa: A002
+        logger.debug(f"明日课程接口: {self.address_string()} {format % args}")
+
+
+class PayloadServer:
+    """
+    本机回环 HTTP 接口,以 JSON 提供预先计算好的明日课程数据
+
+    数据由插件主线程通过 publish() 发布,请求线程只读取快照,
+    支持 ETag / If-None-Match,内容未变化时返回 304
+    """
+
+    def __init__(self, port: int = 0, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+        self._lock = threading.Lock()
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._httpd is not None
+
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        return self._httpd.server_address[:2] if self._httpd else None
+
+    def publish(self, payload: Dict[str, Any]) -> str:
+        """发布新的数据,返回对应的 ETag"""
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        with self._lock:
+            self._body = body
+            self._etag = etag
+        return etag
+
+    def snapshot(self) -> Tuple[Optional[bytes], Optional[str]]:
+        """获取当前发布的数据及其 ETag"""
+        with self._lock:
+            return self._body, self._etag
+
+    def start(self) -> None:
+        """启动接口(失败时抛出 OSError)"""
+        if self._httpd is not None:
+            return
+        httpd = ThreadingHTTPServer((self.host, self.port), _PayloadRequestHandler)
+        httpd.daemon_threads = True
+        httpd.payload_server = self
+        self._httpd = httpd
+        self._thread = threading.Thread(target=httpd.serve_forever, name="cw-tomorrow-tip-server", daemon=True)
+        self._thread.start()
+        logger.info(f"明日课程接口已启动: http://{self.address[0]}:{self.address[1]}/tomorrow")
+
+    def stop(self) -> None:
+        """停止接口"""
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd = None
+        self._thread = None
+        logger.info("明日课程接口已停止")
+
+
 class Plugin(PluginBase):
     """明日课程提醒插件主类"""
 
+    # 插件依赖的上下文键,仅这些键变化时才会使缓存失效
+    CONTEXT_KEYS = ("Schedule_Name", "base_directory")
+
     def __init__(self, cw_contexts: Dict[str, Any], method):
         super().__init__(cw_contexts, method)
         self.settings = QSettings(str(self.PATH / "config.ini"), QSettings.IniFormat)
         self.is_backup_schedule = False
         self.last_notification_key = None  # 记录上次通知的唯一标识
+        self.state = STATE
+        self.context_watcher = ContextWatcher(self.CONTEXT_KEYS)
+        self.context_watcher.prime(cw_contexts or {})
+        self.context_watcher.register(self._invalidate_schedule_cache)
+        # 各阶段熔断器,避免配置或课表损坏时每次 tick 都报错
+        self.breakers = {
+            "settings": CircuitBreaker("设置解析", watch=lambda: self._get_mtime(self.PATH / "config.ini")),
+            "schedule": CircuitBreaker("课表加载", watch=lambda: self._get_mtime(self._get_schedule_path())),
+            "parity": CircuitBreaker("单双周判断", log_level="DEBUG"),
+            "notify": CircuitBreaker("发送通知"),
+            "payload": CircuitBreaker("明日课程接口", watch=lambda: self._get_mtime(self.PATH / "config.ini")),
+        }
+        self.context_watcher.register(self.breakers["schedule"].reset)
+        self.payload_server: Optional[PayloadServer] = None
+        self._payload_key: Optional[Tuple] = None
+        # 性能分析(仅在 config.ini 中设置 profile_ticks 后启用)
+        self._tick_capture: Optional[ProfileCapture] = None
+        self._tick_capture_remaining = 0
+        self._reminder_capture: Optional[ProfileCapture] = None
+        self._reminder_in_tick_capture = False  # 提醒是否已包含在 update 采集中
 
     def execute(self):
         """插件启动时执行"""
         try:
+            self.state.attach(self)
+            self._run_payload_stage()
             if not self.settings.value("enable_tip", True, type=bool):
                 logger.debug("提醒已禁用")
                 return
@@ -69,15 +522,57 @@ class Plugin(PluginBase):
 
     def update(self, cw_contexts: Dict[str, Any]):
         """更新插件状态"""
+        capture = self._tick_capture
+        if capture is None or not self._start_capture(capture):
+            self._update(cw_contexts)
+            return
+        try:
+            self._update(cw_contexts)
+        finally:
+            capture.stop()
+        self._tick_capture_remaining -= 1
+        if self._tick_capture_remaining <= 0:
+            self._tick_capture = None
+            capture.dump()
+            if self._reminder_capture is not None:
+                if self._reminder_in_tick_capture:
+                    self._reminder_capture = None
+                    logger.info("提醒生成已包含在本次 update 性能分析中,不再单独采集")
+                else:
+                    logger.info("提醒性能分析仍在等待下一次提醒生成")
+
+    def _update(self, cw_contexts: Dict[str, Any]):
         super().update(cw_contexts)
+        if self.state.plugin is not self:
+            self.state.attach(self)
+        self.state.cw_contexts = cw_contexts or {}
+        self.context_watcher.check(cw_contexts or {})
+
+        self.settings.sync()
+        # 在熔断检查之前处理,设置阶段持续失败时同样可以开启性能分析
+        self._arm_profiler()
+        self._check_reminder()
+        # 接口阶段独立于提醒时间解析,设置阶段失败时仍然运行
+        self._run_payload_stage()
+
+    def _check_reminder(self) -> None:
+        """解析提醒时间,到达时发送明日课程提醒"""
+        settings_breaker = self.breakers["settings"]
+        if not settings_breaker.allow():
+            return
+        try:
+            settings_snapshot = self._get_settings_snapshot()
+            tip_time_str = settings_snapshot["tip_time"]
+            tip_time = dt.datetime.strptime(tip_time_str, "%H:%M:%S").time()
+        except Exception as e:
+            settings_breaker.record_failure(e)
+            return
+        settings_breaker.record_success()
 
         try:
             # 检查是否到达提醒时间
             current_time = dt.datetime.now().time()
             current_date = dt.date.today()
-            self.settings.sync()
-            tip_time_str = self.settings.value("tip_time", "18:00:00")
-            tip_time = dt.datetime.strptime(tip_time_str, "%H:%M:%S").time()
             current_seconds = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
             tip_seconds = tip_time.hour * 3600 + tip_time.minute * 60 + tip_time.second
             time_diff = abs(current_seconds - tip_seconds)
@@ -85,83 +580,253 @@ class Plugin(PluginBase):
             notification_key = f"{current_date}_{tip_time_str}"
             if (
                 time_diff <= 5  # 5秒时间窗口
-                and self.settings.value("enable_tip", True, type=bool)
+                and settings_snapshot["enable_tip"]
                 and not self.is_backup_schedule
                 and getattr(self, 'last_notification_key', None) != notification_key  # 防止同一时间重复通知
             ):
                 logger.info(f"触发明日课程提醒 - 当前时间: {current_time}, 提醒时间: {tip_time}")
                 tomorrow = dt.date.today() + dt.timedelta(days=1)
                 tomorrow_weekday = tomorrow.weekday()
-                self.show_tomorrow_courses(tomorrow_weekday)
-                self.last_notification_key = notification_key
+                # 仅在 send_notification 本身失败时保留重试,其余情况本次提醒视为已处理
+                if self.show_tomorrow_courses(tomorrow_weekday) is not False:
+                    self.last_notification_key = notification_key
 
         except Exception as e:
             logger.error(f"更新插件状态失败: {e}")
             logger.error(traceback.format_exc())
 
-    def show_tomorrow_courses(self, tomorrow_weekday: int, is_test: bool = False):
+    def _run_payload_stage(self) -> None:
+        """同步并刷新明日课程接口,失败时由熔断器控制重试"""
+        payload_breaker = self.breakers["payload"]
+        if not payload_breaker.allow():
+            return
+        try:
+            self._sync_payload_server()
+            if self.payload_server is not None:
+                self._refresh_payload()
+        except Exception as e:
+            payload_breaker.record_failure(e)
+            return
+        payload_breaker.record_success()
+
+    def _arm_profiler(self) -> None:
+        """
+        检查 config.ini 中的 profile_ticks,大于 0 时对之后 N 次 update
+        以及下一次提醒生成进行性能分析,并立即将开关复位
+        """
+        try:
+            profile_ticks = self.settings.value("profile_ticks", 0, type=int)
+        except Exception as e:
+            logger.warning(f"profile_ticks 设置无效,已忽略: {e}")
+            profile_ticks = None
+        if profile_ticks == 0:
+            return
+        self.settings.setValue("profile_ticks", 0)
+        self.settings.sync()
+        if profile_ticks is None:
+            return
+        if profile_ticks < 0:
+            logger.warning(f"profile_ticks 必须为正整数,已忽略: {profile_ticks}")
+            return
+        if self._tick_capture is not None:
+            logger.info(f"性能分析正在进行中(剩余 {self._tick_capture_remaining} 次更新),已忽略新的请求")
+            return
+        try:
+            self._tick_capture = ProfileCapture("update", self.PATH)
+            self._reminder_capture = ProfileCapture("reminder", self.PATH)
+        except Exception as e:
+            logger.error(f"开启性能分析失败: {e}")
+            self._tick_capture = None
+            self._reminder_capture = None
+            return
+        self._tick_capture_remaining = profile_ticks
+        self._reminder_in_tick_capture = False
+        logger.info(f"开始性能分析: 接下来 {profile_ticks} 次更新及下一次提醒")
+
+    def _start_capture(self, capture: ProfileCapture) -> bool:
+        """开始采集,失败时记录一次日志并取消全部性能分析"""
+        try:
+            capture.start()
+        except Exception as e:
+            logger.error(f"启动性能分析失败,已取消本次采集: {e}")
+            self._tick_capture = None
+            self._reminder_capture = None
+            return False
+        return True
+
+    @contextmanager
+    def _profile_reminder(self):
+        """若已开启提醒性能分析,则对本次提醒生成进行采集"""
+        capture = self._reminder_capture
+        if capture is None:
+            yield
+            return
+        # 与 update 采集重叠时不单独采集(同一线程只能启用一个分析器)
+        if self._tick_capture is not None and self._tick_capture.active:
+            self._reminder_in_tick_capture = True
+            yield
+            return
+        if not self._start_capture(capture):
+            yield
+            return
+        self._reminder_capture = None
+        try:
+            yield
+        finally:
+            capture.stop()
+            capture.dump()
+
+    def _sync_payload_server(self) -> None:
+        """根据设置启动或停止明日课程接口"""
+        # 接口设置不放入设置快照,格式错误时只影响接口阶段,不影响提醒
+        enabled = self.settings.value("enable_payload_server", False, type=bool)
+        port = self.settings.value("payload_server_port", 18081, type=int)
+        server = self.payload_server
+        if server is not None and (not enabled or server.port != port):
+            self.stop_payload_server()
+        if not enabled or self.payload_server is not None:
+            return
+        server = PayloadServer(port)
+        # 端口被占用时抛出 OSError,由接口阶段的熔断器按退避重试
+        server.start()
+        self.payload_server = server
+
+    def stop_payload_server(self) -> None:
+        """停止明日课程接口"""
+        if self.payload_server is None:
+            return
+        self.payload_server.stop()
+        self.payload_server = None
+        self._payload_key = None
+
+    def _refresh_payload(self) -> None:
+        """课表、设置或日期变化时重新计算并发布明日课程数据"""
+        tomorrow = dt.date.today() + dt.timedelta(days=1)
+        schedule_path = self._get_schedule_path()
+        settings_snapshot = self._get_settings_snapshot()
+        key = (
+            tomorrow,
+            schedule_path,
+            self._get_mtime(schedule_path),
+            settings_snapshot["course_count"],
+            tuple(settings_snapshot["excluded_courses"]),
+            self.is_even_week(),
+        )
+        if key == self._payload_key:
+            return
+        self._payload_key = key  # 计算失败时同样记录,避免每次 tick 重复计算
+        payload = self.build_tomorrow_payload(tomorrow)
+        etag = self.payload_server.publish(payload)
+        logger.debug(f"明日课程数据已更新: {etag}")
+
+    def build_tomorrow_payload(self, tomorrow: Optional[dt.date] = None) -> Dict[str, Any]:
+        """
+        计算明日课程数据
+
+        Args:
+            tomorrow: 目标日期,默认为明天
+
+        Returns:
+            可直接序列化为 JSON 的明日课程数据
+        """
+        if tomorrow is None:
+            tomorrow = dt.date.today() + dt.timedelta(days=1)
+        payload: Dict[str, Any] = {
+            "date": tomorrow.isoformat(),
+            "weekday": tomorrow.weekday(),
+            "schedule_name": self.cw_contexts.get("Schedule_Name", ""),
+            "courses": [],
+            "error": None,
+        }
+        schedule_path = self._get_schedule_path()
+        if schedule_path is None or not schedule_path.exists():
+            payload["error"] = "课表文件不存在"
+        else:
+            try:
+                schedule_data = self._load_schedule_data_from_path(schedule_path)
+                payload["courses"] = self._extract_tomorrow_courses(schedule_data, tomorrow.weekday())
+            except CircuitOpenError as e:
+                logger.debug(f"计算明日课程数据跳过: {e}")
+                payload["error"] = str(e)
+            except Exception as e:
+                logger.error(f"计算明日课程数据失败: {e}")
+                payload["error"] = str(e)
+        title, subtitle, content = self._format_legacy_notification(payload["courses"])
+        payload.update(title=title, subtitle=subtitle, content=content)
+        return payload
+
+    def show_tomorrow_courses(self, tomorrow_weekday: int, is_test: bool = False) -> Optional[bool]:
         """
         显示明日的课程信息
 
         Args:
             tomorrow_weekday: 明日的星期几(0-6,0表示星期一)
             is_test: 是否为测试通知
+
+        Returns:
+            发送成功返回 True,send_notification 失败返回 False,
+            因课表缺失、阶段熔断等原因未发送时返回 None
         """
-        if is_test:
-            logger.debug("测试通知")
-        schedule_name = self.cw_contexts.get("Schedule_Name", "")
-        if not schedule_name:
-            logger.error("无法获取课程信息(未获得课程表)")
-            return
+        with self._profile_reminder():
+            if is_test:
+                logger.debug("测试通知")
+            schedule_name = self.cw_contexts.get("Schedule_Name", "")
+            if not schedule_name:
+                logger.error("无法获取课程信息(未获得课程表)")
+                return None
 
-        schedule_path = Path(self.cw_contexts.get("base_directory", "")) / "config" / "schedule" / schedule_name
-        if not schedule_path.exists():
-            logger.error(f"课表文件不存在: {schedule_path}")
-            return
+            schedule_path = Path(self.cw_contexts.get("base_directory", "")) / "config" / "schedule" / schedule_name
+            if not schedule_path.exists():
+                logger.error(f"课表文件不存在: {schedule_path}")
+                return None
 
-        try:
-            schedule_data = self._load_schedule_data_from_path(schedule_path)
-            tomorrow_courses = self._extract_tomorrow_courses(schedule_data, tomorrow_weekday)
-            self._send_notification_legacy(tomorrow_courses, is_test)  # 发送通知
-        except Exception as e:
-            logger.error(f"获取课程信息失败: {e}")
+            try:
+                schedule_data = self._load_schedule_data_from_path(schedule_path)
+                tomorrow_courses = self._extract_tomorrow_courses(schedule_data, tomorrow_weekday)
+                return self._send_notification_legacy(tomorrow_courses, is_test)  # 发送通知
+            except CircuitOpenError as e:
+                logger.debug(f"获取课程信息跳过: {e}")
+            except Exception as e:
+                logger.error(f"获取课程信息失败: {e}")
+            return None
 
     def check_schedule(self) -> None:
         """检查课表,发送提醒"""
-        try:
-            settings = self._load_settings()
-            if not settings.get("enabled", True):
-                return
-
-            # logger.debug(f"设置: {settings}")
-
-            now = datetime.now()
-            reminder_time = settings.get("reminder_time", "21:00")
+        with self._profile_reminder():
             try:
-                hour, minute = map(int, reminder_time.split(":"))
-                target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                # logger.debug(f"当前时间: {now.strftime('%H:%M')}, 提醒时间: {reminder_time}")
-            except (ValueError, AttributeError):
-                logger.error(f"提醒时间格式无效: {reminder_time}")
-                return
+                settings = self._load_settings()
+                if not settings.get("enabled", True):
+                    return
 
-            # 检查是否到达提醒时间(允许1分钟误差)
-            time_diff = abs((now - target_time).total_seconds())
-            # logger.debug(f"时间差: {time_diff} 秒")
-            if time_diff > 60:
-                return
-            tomorrow_classes = self._get_tomorrow_classes()
-            if not tomorrow_classes:
-                logger.debug("明日无课程")
-                return
-            logger.debug(f"获取到明日课程: {len(tomorrow_classes)} 门")
-            for i, cls in enumerate(tomorrow_classes):
-                logger.debug(f"  {i + 1}. {cls.get('name', '未知')} ({cls.get('time', '未知时间')})")
-            self._send_notification(tomorrow_classes, settings)
+                # logger.debug(f"设置: {settings}")
 
-        except Exception as e:
-            logger.error(f"检查课表时发生错误: {e}")
-            logger.error(f"详细错误信息: {traceback.format_exc()}")
+                now = datetime.now()
+                reminder_time = settings.get("reminder_time", "21:00")
+                try:
+                    hour, minute = map(int, reminder_time.split(":"))
+                    target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                    # logger.debug(f"当前时间: {now.strftime('%H:%M')}, 提醒时间: {reminder_time}")
+                except (ValueError, AttributeError):
+                    logger.error(f"提醒时间格式无效: {reminder_time}")
+                    return
+
+                # 检查是否到达提醒时间(允许1分钟误差)
+                time_diff = abs((now - target_time).total_seconds())
+                # logger.debug(f"时间差: {time_diff} 秒")
+                if time_diff > 60:
+                    return
+                tomorrow_classes = self._get_tomorrow_classes()
+                if not tomorrow_classes:
+                    logger.debug("明日无课程")
+                    return
+                logger.debug(f"获取到明日课程: {len(tomorrow_classes)} 门")
+                for i, cls in enumerate(tomorrow_classes):
+                    logger.debug(f"  {i + 1}. {cls.get('name', '未知')} ({cls.get('time', '未知时间')})")
+                self._send_notification(tomorrow_classes, settings)
+
+            except Exception as e:
+                logger.error(f"检查课表时发生错误: {e}")
+                logger.error(f"详细错误信息: {traceback.format_exc()}")
 
     def _load_settings(self) -> Dict[str, Any]:
         """加载插件设置"""
@@ -274,9 +939,11 @@ class Plugin(PluginBase):
                 #     files = list(schedule_dir.iterdir())
                 #     logger.debug(f"schedule目录下的文件: {files}")
                 return None
-            with open(schedule_path, encoding="utf-8") as f:
-                return json.load(f)
+            return self._load_schedule_data_from_path(schedule_path)
 
+        except CircuitOpenError as e:
+            logger.debug(f"加载课表数据跳过: {e}")
+            return None
         except Exception as e:
             logger.error(f"加载课表数据失败: {e}")
             logger.error(f"详细错误信息: {traceback.format_exc()}")
@@ -286,14 +953,7 @@ class Plugin(PluginBase):
         self, course_name: str, excluded_courses: Optional[List[str]] = None
     ) -> bool:
         """检查课程是否有效"""
-        if not course_name:
-            return False
-
-        default_excluded = ["未添加", "暂无课程", "", "无课程"]
-        if excluded_courses is None:
-            excluded_courses = []
-        all_excluded = default_excluded + excluded_courses
-        return course_name not in all_excluded
+        return is_valid_course(course_name, excluded_courses)
 
     def _parse_v2_schedule(
         self, schedule_data: Dict[str, Any], weekday: int
@@ -355,14 +1015,15 @@ class Plugin(PluginBase):
                     else:
                         class_list.append(cls["name"])
                 content = f"明日共有 {len(classes)} 节课程: \n" + "\n".join(class_list)
-            self.method.send_notification(
+            if not self._notify(
                 state=1,
                 lesson_name="明日课程",
                 title=title,
                 subtitle=f"共 {len(classes)} 节课",
                 content=content,
                 duration=5000,
-            )
+            ):
+                return
 
             logger.info(f"已发送明日课程提醒,共 {len(classes)} 节课")
 
@@ -393,13 +1054,59 @@ class Plugin(PluginBase):
             tomorrow_courses = self._extract_tomorrow_courses(schedule_data, tomorrow_weekday)
             self._send_notification_legacy(tomorrow_courses, is_test)
 
+        except CircuitOpenError as e:
+            logger.debug(f"获取明日课程信息跳过: {e}")
         except Exception as e:
             logger.error(f"获取明日课程信息失败: {e}")
 
+    def _get_schedule_path(self) -> Optional[Path]:
+        """获取当前课表文件路径"""
+        schedule_name = self.cw_contexts.get("Schedule_Name", "")
+        if not schedule_name:
+            return None
+        return Path(self.cw_contexts.get("base_directory", "")) / "config" / "schedule" / schedule_name
+
     def _load_schedule_data_from_path(self, schedule_path: str) -> Dict[str, Any]:
-        """从指定路径加载课表数据"""
-        with open(schedule_path, encoding="utf-8") as f:
-            return json.load(f)
+        """从指定路径加载课表数据(文件未修改时复用缓存)"""
+        schedule_path = Path(schedule_path)
+        mtime_ns = schedule_path.stat().st_mtime_ns
+        cache = self.state.schedule
+        if cache is not None and cache[0] == schedule_path and cache[1] == mtime_ns:
+            return cache[2]
+        breaker = self.breakers["schedule"]
+        if not breaker.allow():
+            raise CircuitOpenError("课表加载已暂停,等待课表文件变化后重试")
+        try:
+            with open(schedule_path, encoding="utf-8") as f:
+                schedule_data = json.load(f)
+        except Exception as e:
+            breaker.record_failure(e)
+            raise
+        breaker.record_success()
+        self.state.schedule = (schedule_path, mtime_ns, schedule_data)
+        return schedule_data
+
+    @staticmethod
+    def _get_mtime(path: Optional[Path]) -> Optional[int]:
+        """获取文件修改时间,文件不存在时返回 None"""
+        if path is None:
+            return None
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _invalidate_schedule_cache(self, changed: Dict[str, Tuple[Any, Any]]) -> None:
+        """课表相关上下文变化时清除课表缓存"""
+        logger.debug(f"上下文已变化,清除课表缓存: {list(changed)}")
+        self.state.invalidate_schedule()
+
+    def _get_settings_snapshot(self) -> Dict[str, Any]:
+        """获取设置快照,config.ini 变化时重新读取"""
+        mtime = self._get_mtime(self.PATH / "config.ini")
+        if self.state.settings_snapshot is None or self.state.settings_mtime != mtime:
+            return self.state.update_settings(self.settings, mtime)
+        return self.state.settings_snapshot
 
     def _extract_tomorrow_courses(self, schedule_data: Dict[str, Any], weekday: int) -> List[str]:
         """
@@ -412,37 +1119,55 @@ class Plugin(PluginBase):
         Returns:
             明日课程列表
         """
-        tomorrow_courses = []
-        timeline = self._get_timeline_for_day(schedule_data, weekday)
-        schedule = self._get_schedule_for_day(schedule_data, weekday)
+        settings_snapshot = self._get_settings_snapshot()
+        return self.get_course_index(schedule_data).select(
+            weekday, self.is_even_week(), settings_snapshot["excluded_courses"], settings_snapshot["course_count"]
+        )
+
+    def get_course_index(self, schedule_data: Optional[Dict[str, Any]] = None) -> Optional[CourseIndex]:
+        """
+        获取当前课表的内存索引,课表数据变化时自动重建
+
+        Args:
+            schedule_data: 课表数据,默认从当前课表文件(缓存)加载
+
+        Returns:
+            课程索引,无法获取课表时返回 None
+        """
+        if schedule_data is None:
+            schedule_data = self._load_schedule_data()
+            if not schedule_data:
+                return None
+        index = self.state.course_index
+        if index is None or index.schedule_data is not schedule_data:
+            index = CourseIndex(schedule_data, self.expand_lessons)
+            self.state.course_index = index
+        return index
+
+    def expand_lessons(self, schedule_data: Dict[str, Any], weekday: int, is_even_week: bool) -> List[str]:
+        """按时间线展开指定日期的课程节次(跳过课间)"""
+        timeline = self._get_timeline_for_day(schedule_data, weekday, is_even_week)
+        schedule = self._get_schedule_for_day(schedule_data, weekday, is_even_week)
         if not timeline or not schedule:
             logger.info("明日没有课程")
             return []
 
-        course_count = self.settings.value("course_count", 4, type=int)
-        excluded_courses = self._get_excluded_courses()
-        class_index = 0
+        lessons = []
         for timeline_item in timeline:
             if len(timeline_item) >= 4:
-                is_break, part_id, item_index, duration = timeline_item[:4]
+                is_break = timeline_item[0]
                 # 只处理课程
-                if not is_break and class_index < len(schedule):
-                    course_name = schedule[class_index]
-                    if self._is_valid_course(course_name, excluded_courses):
-                        tomorrow_courses.append(course_name)
-                        # logger.debug(f"添加课程: {course_name}")
-                        if len(tomorrow_courses) >= course_count:
-                            break
-                    # else:
-                    #     logger.debug(f"课程 '{course_name}' 在排除列表中或为无效课程")
-                    class_index += 1
-
-        return tomorrow_courses
-
-    def _get_timeline_for_day(self, schedule_data: Dict[str, Any], weekday: int) -> List[List]:
+                if not is_break and len(lessons) < len(schedule):
+                    lessons.append(schedule[len(lessons)])
+        return lessons
+
+    def _get_timeline_for_day(
+        self, schedule_data: Dict[str, Any], weekday: int, is_even_week: Optional[bool] = None
+    ) -> List[List]:
         """获取指定日期的时间线,按照主程序逻辑"""
         try:
-            is_even_week = self._is_even_week()
+            if is_even_week is None:
+                is_even_week = self.is_even_week()
             timeline_key = "timeline_even" if is_even_week else "timeline"
             # logger.debug(
             #     f"获取时间线: weekday={weekday}, is_even_week={is_even_week}, timeline_key={timeline_key}"
@@ -480,11 +1205,14 @@ class Plugin(PluginBase):
             logger.error(f"获取时间线失败: {e}")
             return []
 
-    def _get_schedule_for_day(self, schedule_data: Dict[str, Any], weekday: int) -> List[str]:
+    def _get_schedule_for_day(
+        self, schedule_data: Dict[str, Any], weekday: int, is_even_week: Optional[bool] = None
+    ) -> List[str]:
         """获取指定日期的课程安排,按照主程序逻辑"""
         try:
             # 判断单双周
-            is_even_week = self._is_even_week()
+            if is_even_week is None:
+                is_even_week = self.is_even_week()
             schedule_key = "schedule_even" if is_even_week else "schedule"
             schedule_data_dict = schedule_data.get(schedule_key, {})
             weekday_str = str(weekday)
@@ -509,11 +1237,20 @@ class Plugin(PluginBase):
             logger.error(f"获取课程安排失败: {e}")
             return []
 
-    def _is_even_week(self) -> bool:
-        """判断是否为双周"""
+    def is_even_week(self) -> bool:
+        """判断是否为双周(结果在进程内短暂缓存)"""
+        is_even_week = self.state.get_parity()
+        if is_even_week is None:
+            is_even_week = self._resolve_even_week()
+            self.state.set_parity(is_even_week)
+        return is_even_week
+
+    def _resolve_even_week(self) -> bool:
+        """从主程序配置或当前周数判断是否为双周"""
         try:
             # 尝试从主程序获取单双周信息
-            if hasattr(self, "cw_contexts") and self.cw_contexts:
+            parity_breaker = self.breakers["parity"]
+            if hasattr(self, "cw_contexts") and self.cw_contexts and parity_breaker.allow():
                 try:
                     main_path = Path(__file__).parent.parent.parent
                     if str(main_path) not in sys.path:
@@ -522,8 +1259,10 @@ class Plugin(PluginBase):
                     temp_schedule = config_center.read_conf('Temp', 'set_schedule')
                     if temp_schedule not in ('', None):
                         week_type = int(temp_schedule)
+                        parity_breaker.record_success()
                         return week_type == 1  # 1表示双周
                     start_date_str = config_center.read_conf('Date', 'start_date')
+                    parity_breaker.record_success()
                     if start_date_str not in ('', None):
                         try:
                             start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
@@ -532,10 +1271,8 @@ class Plugin(PluginBase):
                             return week_num % 2 == 0  # 偶数周为双周
                         except (ValueError, TypeError) as e:
                             logger.warning(f"解析开学日期失败: {e}")
-                except ImportError as e:
-                    logger.debug(f"无法导入主程序配置模块: {e}")
                 except Exception as e:
-                    logger.debug(f"获取主程序单双周配置失败: {e}")
+                    parity_breaker.record_failure(e)
             today = dt.date.today()
             week_number = today.isocalendar()[1]
             return week_number % 2 == 0
@@ -546,11 +1283,10 @@ class Plugin(PluginBase):
 
     def _get_excluded_courses(self) -> List[str]:
         """获取排除的课程列表"""
-        excluded_courses_str = self.settings.value("excluded_courses", "")
-        return [c.strip() for c in excluded_courses_str.split(",") if c.strip()]
+        return list(self._get_settings_snapshot()["excluded_courses"])
 
-    def _send_notification_legacy(self, courses: List[str], is_test: bool = False):
-        """发送通知"""
+    def _format_legacy_notification(self, courses: List[str], is_test: bool = False) -> Tuple[str, str, str]:
+        """生成通知的标题、副标题与内容"""
         title = "明日课程提醒"
         if is_test:
             title = "测试通知 - " + title
@@ -560,18 +1296,49 @@ class Plugin(PluginBase):
         else:
             content = "明日没有课程安排"
             subtitle = "享受休息吧!"
-        notification_duration = self.settings.value("notification_duration", 10000, type=int)
+        return title, subtitle, content
+
+    def _send_notification_legacy(self, courses: List[str], is_test: bool = False) -> Optional[bool]:
+        """发送通知,返回值同 _notify"""
+        title, subtitle, content = self._format_legacy_notification(courses, is_test)
+        notification_duration = self._get_settings_snapshot()["notification_duration"]
+        # logger.info(f"通知发送成功,显示时间: {notification_duration}ms")
+        return self._notify(
+            is_test=is_test,
+            state=4,
+            title=title,
+            content=content,
+            subtitle=subtitle,
+            duration=notification_duration,
+        )
+
+    def _notify(self, is_test: bool = False, **kwargs) -> Optional[bool]:
+        """
+        通过主程序发送通知
+
+        测试通知不经过熔断器,其失败也不计入熔断
+
+        Returns:
+            发送成功返回 True,send_notification 失败返回 False,熔断中跳过时返回 None
+        """
+        if is_test:
+            try:
+                self.method.send_notification(**kwargs)
+            except Exception as e:
+                logger.error(f"发送测试通知失败: {e}")
+                return False
+            return True
+        breaker = self.breakers["notify"]
+        if not breaker.allow():
+            logger.warning(f"发送通知已暂停(连续失败 {breaker.failures} 次),本次提醒未发送")
+            return None
         try:
-            self.method.send_notification(
-                state=4,
-                title=title,
-                content=content,
-                subtitle=subtitle,
-                duration=notification_duration,
-            )
-            # logger.info(f"通知发送成功,显示时间: {notification_duration}ms")
+            self.method.send_notification(**kwargs)
         except Exception as e:
-            logger.error(f"发送通知失败: {e}")
+            breaker.record_failure(e)
+            return False
+        breaker.record_success()
+        return True
 
 
 class Settings(SettingsBase):
@@ -631,6 +1398,82 @@ class Settings(SettingsBase):
         self.enableTip.checkedChanged.connect(self.save_settings)
         self.SpinBox.valueChanged.connect(self.save_settings)
 
+        # 主程序插件加载器,只查找一次
+        self._p_loader = None
+        self._p_loader_checked = False
+        # 明日课程预览(基于内存中的课程索引,输入时仅检查课表修改时间)
+        self.previewLabel = self.findChild(BodyLabel, "previewLabel")
+        if self.previewLabel:
+            if self.excludedCoursesEdit:
+                self.excludedCoursesEdit.textChanged.connect(self.update_preview)
+            self.SpinBox.valueChanged.connect(self.update_preview)
+            if self.timeEdit:
+                self.timeEdit.timeChanged.connect(self.update_preview)
+            self.update_preview()
+
+    def _get_live_plugin(self) -> Optional["Plugin"]:
+        """获取正在运行的插件实例,未登记时回退到主程序的插件加载器"""
+        plugin_instance = STATE.plugin
+        if plugin_instance is not None:
+            return plugin_instance
+        if not self._p_loader_checked:
+            self._p_loader_checked = True
+            try:
+                from plugin import p_loader  # noqa
+
+                self._p_loader = p_loader
+            except Exception as e:
+                logger.debug(f"无法获取插件加载器: {e}")
+        if self._p_loader is None:
+            return None
+        return self._p_loader.plugins_dict.get("cw-tomorrow-tip")
+
+    def _get_preview_data(self) -> Tuple[Optional[CourseIndex], Optional[bool]]:
+        """
+        获取课程索引与单双周信息
+
+        课程索引经由插件实例获取,课表文件修改后会自动重建;
+        单双周无法判断时返回 None
+        """
+        plugin_instance = self._get_live_plugin()
+        if plugin_instance is None:
+            return None, STATE.get_parity()
+        index = None
+        is_even_week = STATE.get_parity()
+        try:
+            index = plugin_instance.get_course_index()
+            if is_even_week is None:
+                is_even_week = plugin_instance.is_even_week()
+        except Exception as e:
+            logger.error(f"加载课程预览失败: {e}")
+        return index, is_even_week
+
+    def update_preview(self, *_):
+        """根据当前输入刷新明日课程预览"""
+        if not self.previewLabel:
+            return
+        index, is_even_week = self._get_preview_data()
+        if index is None:
+            self.previewLabel.setText("无法获取当前课表,请确认插件已启用且课表存在")
+            return
+        tomorrow = dt.date.today() + dt.timedelta(days=1)
+        excluded_courses = parse_excluded_courses(
+            self.excludedCoursesEdit.text() if self.excludedCoursesEdit else ""
+        )
+        # 单双周未知时与提醒的回退行为一致,按单周筛选
+        courses = index.select(tomorrow.weekday(), bool(is_even_week), excluded_courses, self.SpinBox.value())
+        content = " | ".join(courses) if courses else "明日没有课程安排"
+        if is_even_week is None:
+            week_type = "单双周未知"
+        else:
+            week_type = "双周" if is_even_week else "单周"
+        tip_time = self.timeEdit.time.toString("HH:mm:ss") if self.timeEdit else ""
+        header = f"{tip_time} 提醒 · 周{tomorrow.weekday() + 1}({week_type})"
+        schedule_name = STATE.cw_contexts.get("Schedule_Name", "")
+        if schedule_name:
+            header = f"{schedule_name} · {header}"
+        self.previewLabel.setText(f"{header}\n{content}")
+
     def save_settings(self):
         """保存设置到配置文件"""
         if not hasattr(self, "is_backup_schedule") or not self.is_backup_schedule:
@@ -647,6 +1490,10 @@ class Settings(SettingsBase):
             notification_duration_ms = notification_duration_seconds * 1000
             self.settings.setValue("notification_duration", notification_duration_ms)
         self.settings.sync()
+        try:
+            STATE.update_settings(self.settings, Plugin._get_mtime(self.PATH / "config.ini"))
+        except Exception as e:
+            logger.warning(f"更新设置快照失败: {e}")
 
     def test_notification(self):
         """测试通知功能"""
@@ -666,25 +1513,20 @@ class Settings(SettingsBase):
         tomorrow_weekday = tomorrow.weekday()
 
         try:
-            from plugin import p_loader  # noqa
-
-            plugin_name = "cw-tomorrow-tip"
-            if plugin_name in p_loader.plugins_dict:
-                plugin_instance = p_loader.plugins_dict[plugin_name]
-                plugin_instance.show_tomorrow_courses(tomorrow_weekday, is_test=True)
+            plugin_instance = self._get_live_plugin()
+            if plugin_instance is None:
+                logger.warning("测试通知失败: 插件未运行")
+            elif plugin_instance.show_tomorrow_courses(tomorrow_weekday, is_test=True):
                 return
-            plugin_instance = Plugin(
-                self.cw_contexts if hasattr(self, "cw_contexts") else {},
-                self.method if hasattr(self, "method") else None,
-            )
-            plugin_instance.PATH = self.PATH
-            plugin_instance.show_tomorrow_courses(tomorrow_weekday, is_test=True)
-            return
         except Exception as e:
             error_msg = f"测试通知失败: {e}"
             logger.error(error_msg)
 
-        msg_box = MessageBox("测试通知", "无法发送测试通知", self)
+        schedule_name = STATE.cw_contexts.get("Schedule_Name", "")
+        message = "无法发送测试通知"
+        if schedule_name:
+            message += f"\n当前课表: {schedule_name}"
+        msg_box = MessageBox("测试通知", message, self)
         msg_box.yesButton.setText("确定")
         msg_box.cancelButton.setVisible(False)
         msg_box.exec()
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("PyQt5")
+pytest.importorskip("qfluentwidgets")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+from main import CircuitBreaker  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(main.time, "monotonic", fake_clock)
+    return fake_clock
+
+
+def _fail(breaker, times=1):
+    for _ in range(times):
+        breaker.record_failure(ValueError("bad"))
+
+
+def test_stays_closed_below_threshold(clock):
+    breaker = CircuitBreaker("test", threshold=3)
+    _fail(breaker, 2)
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_opens_at_threshold(clock):
+    breaker = CircuitBreaker("test", threshold=3, base_delay=5)
+    _fail(breaker, 3)
+    assert breaker.is_open
+    assert not breaker.allow()
+    clock.now += 4.9
+    assert not breaker.allow()
+    clock.now += 0.2
+    assert breaker.allow()
+
+
+def test_backoff_doubles_up_to_max_delay(clock):
+    breaker = CircuitBreaker("test", threshold=1, base_delay=5, max_delay=15)
+    expected_delays = [5, 10, 15, 15]
+    for delay in expected_delays:
+        _fail(breaker)
+        clock.now += delay - 0.1
+        assert not breaker.allow()
+        clock.now += 0.2
+        assert breaker.allow()
+
+
+def test_success_recovers_and_resets_backoff(clock):
+    breaker = CircuitBreaker("test", threshold=1, base_delay=5)
+    _fail(breaker, 3)
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+    _fail(breaker)
+    clock.now += 5.1
+    assert breaker.allow()
+
+
+def test_watch_change_allows_retry_before_backoff(clock):
+    watched = {"mtime": 1}
+    breaker = CircuitBreaker("test", threshold=1, base_delay=60, watch=lambda: watched["mtime"])
+    _fail(breaker)
+    assert not breaker.allow()
+    watched["mtime"] = 2
+    assert breaker.allow()
+    # 重试再次失败后以新的状态为基准
+    _fail(breaker)
+    assert not breaker.allow()
+
+
+def test_failing_watch_is_treated_as_unchanged(clock):
+    def broken_watch():
+        raise OSError("gone")
+
+    breaker = CircuitBreaker("test", threshold=1, base_delay=60, watch=broken_watch)
+    _fail(breaker)
+    assert not breaker.allow()
+
+
+def test_reset_clears_failures(clock):
+    breaker = CircuitBreaker("test", threshold=2, base_delay=5)
+    _fail(breaker, 2)
+    assert not breaker.allow()
+    breaker.reset()
+    assert not breaker.is_open
+    assert breaker.allow()
+    _fail(breaker)
+    assert breaker.allow()
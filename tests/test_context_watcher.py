@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("PyQt5")
+pytest.importorskip("qfluentwidgets")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import ContextWatcher  # noqa: E402
+
+
+@pytest.fixture
+def watcher():
+    context_watcher = ContextWatcher(("Schedule_Name", "base_directory"))
+    context_watcher.prime({"Schedule_Name": "a.json", "base_directory": "/cw"})
+    return context_watcher
+
+
+def test_unchanged_context_does_not_fire(watcher):
+    calls = []
+    watcher.register(calls.append)
+    assert watcher.check({"Schedule_Name": "a.json", "base_directory": "/cw"}) is False
+    assert calls == []
+
+
+def test_equal_but_not_identical_value_does_not_fire(watcher):
+    calls = []
+    watcher.register(calls.append)
+    assert watcher.check({"Schedule_Name": "".join(["a", ".json"]), "base_directory": "/cw"}) is False
+    assert calls == []
+
+
+def test_change_fires_with_old_and_new_values(watcher):
+    calls = []
+    watcher.register(calls.append)
+    assert watcher.check({"Schedule_Name": "b.json", "base_directory": "/cw"}) is True
+    assert calls == [{"Schedule_Name": ("a.json", "b.json")}]
+    # 同一变化只触发一次
+    assert watcher.check({"Schedule_Name": "b.json", "base_directory": "/cw"}) is False
+    assert len(calls) == 1
+
+
+def test_undeclared_keys_are_ignored(watcher):
+    calls = []
+    watcher.register(calls.append)
+    assert watcher.check({"Schedule_Name": "a.json", "base_directory": "/cw", "Other": 1}) is False
+    assert calls == []
+
+
+def test_callback_fires_only_for_its_keys(watcher):
+    schedule_calls, directory_calls = [], []
+    watcher.register(schedule_calls.append, keys=["Schedule_Name"])
+    watcher.register(directory_calls.append, keys=["base_directory"])
+    watcher.check({"Schedule_Name": "a.json", "base_directory": "/other"})
+    assert schedule_calls == []
+    assert directory_calls == [{"base_directory": ("/cw", "/other")}]
+
+
+def test_missing_key_counts_as_change(watcher):
+    calls = []
+    watcher.register(calls.append)
+    assert watcher.check({"base_directory": "/cw"}) is True
+    assert calls == [{"Schedule_Name": ("a.json", None)}]
+
+
+def test_register_unknown_key_raises(watcher):
+    with pytest.raises(KeyError):
+        watcher.register(lambda changed: None, keys=["Unknown"])
+
+
+def test_failing_callback_does_not_block_others(watcher):
+    calls = []
+
+    def broken(changed):
+        raise RuntimeError("boom")
+
+    watcher.register(broken)
+    watcher.register(calls.append)
+    assert watcher.check({"Schedule_Name": "b.json", "base_directory": "/cw"}) is True
+    assert len(calls) == 1
@@ -0,0 +1,70 @@
+import json
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("loguru")
+pytest.importorskip("PyQt5")
+pytest.importorskip("qfluentwidgets")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from main import PayloadServer  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    payload_server = PayloadServer(0)
+    payload_server.start()
+    yield payload_server
+    payload_server.stop()
+
+
+def _request(server, path="/tomorrow", headers=None):
+    host, port = server.address
+    request = urllib.request.Request(f"http://{host}:{port}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_not_published_yet(server):
+    status, _, _ = _request(server)
+    assert status == 503
+
+
+def test_serves_payload_with_etag(server):
+    etag = server.publish({"courses": ["数学", "英语"]})
+    status, headers, body = _request(server)
+    assert status == 200
+    assert headers["ETag"] == etag
+    assert json.loads(body.decode("utf-8")) == {"courses": ["数学", "英语"]}
+
+
+def test_if_none_match_returns_304(server):
+    etag = server.publish({"courses": ["数学"]})
+    status, headers, body = _request(server, headers={"If-None-Match": etag})
+    assert status == 304
+    assert headers["ETag"] == etag
+    assert body == b""
+
+
+def test_unknown_path_returns_404(server):
+    server.publish({"courses": []})
+    status, _, _ = _request(server, path="/other")
+    assert status == 404
+
+
+def test_changed_payload_gets_new_etag(server):
+    old_etag = server.publish({"courses": ["数学"]})
+    new_etag = server.publish({"courses": ["体育"]})
+    assert new_etag != old_etag
+    status, headers, body = _request(server, headers={"If-None-Match": old_etag})
+    assert status == 200
+    assert headers["ETag"] == new_etag
+    assert json.loads(body.decode("utf-8")) == {"courses": ["体育"]}